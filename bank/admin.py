@@ -1,6 +1,74 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db.models import FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils.translation import ugettext_lazy as _
 
 from bank.models import Customer, Transaction, Account
+from bank.pagination import EstimatedCountPaginator
 
 
-admin.site.register([Customer, Transaction, Account])
+def _amount_sum(account_field: str) -> Coalesce:
+    """Sum of the transactions amount related to the outer account by account_field"""
+    transactions = (
+        Transaction.objects.filter(**{account_field: OuterRef("pk")})
+        .order_by()
+        .values(account_field)
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    return Coalesce(Subquery(transactions), 0.0, output_field=FloatField())
+
+
+@admin.register(Customer)
+class CustomerAdmin(admin.ModelAdmin):
+    list_display = ("id", "name")
+    search_fields = ("name",)
+
+
+class AccountChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        # Only the accounts of the page get their balance, the counts stay plain
+        # COUNT(*) queries. Subqueries instead of joins so incomes and payments do
+        # not multiply each other
+        balances = dict(
+            Account.objects.filter(pk__in=[account.pk for account in self.result_list])
+            .annotate(balance=_amount_sum("receiver") - _amount_sum("origin"))
+            .values_list("pk", "balance")
+        )
+        for account in self.result_list:
+            account.balance = balances[account.pk]
+
+
+@admin.register(Account)
+class AccountAdmin(admin.ModelAdmin):
+    list_display = ("identifier", "owner", "balance", "creation_datetime")
+    list_select_related = ("owner",)
+    search_fields = ("identifier",)
+    autocomplete_fields = ("owner",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return AccountChangeList
+
+    @admin.display(description=_("Balance"))
+    def balance(self, account: Account) -> float:
+        return account.balance
+
+
+@admin.register(Transaction)
+class TransactionAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "concept",
+        "amount",
+        "origin",
+        "receiver",
+        "creation_datetime",
+    )
+    list_select_related = ("origin", "receiver")
+    autocomplete_fields = ("origin", "receiver")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,186 @@
+"""
+Support for the ``Idempotency-Key`` header.
+
+The first request with a key stores its response, retries with the same key get
+that response back without being validated or executed again. A retry that arrives
+while the first request is still running waits for its response.
+"""
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework.response import Response
+
+from ..db import run_write
+from ..models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+
+# Seconds a stored response is kept
+KEY_TTL = getattr(settings, "BANK_IDEMPOTENCY_KEY_TTL", 24 * 60 * 60)
+
+# Seconds a retry waits for the first request with the same key to finish
+WAIT_TIMEOUT = getattr(settings, "BANK_IDEMPOTENCY_WAIT_TIMEOUT", 5)
+WAIT_INTERVAL = 0.1
+
+# Seconds after which a request still in progress is taken as abandoned, a retry
+# then takes its key over. Keep it well above the time a write can take
+LEASE = getattr(settings, "BANK_IDEMPOTENCY_LEASE", 60)
+
+
+class KeyTakenOver(Exception):
+    """The lease of the key expired and a retry took it over"""
+
+
+def expiration_datetime():
+    return timezone.now() - timedelta(seconds=KEY_TTL)
+
+
+def purge_expired() -> int:
+    deleted, _rows = IdempotencyKey.objects.filter(
+        creation_datetime__lt=expiration_datetime()
+    ).delete()
+    return deleted
+
+
+def request_hash(request) -> str:
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.md5(f"{request.method}:{body}".encode()).hexdigest()
+
+
+def acquire(key: str, path: str, fingerprint: str):
+    """
+    Record of the key for this request, or None when another request holds it.
+    A record left in progress longer than the lease is taken over, the conditional
+    update makes sure only one retry gets it. The started_datetime of the record
+    identifies its holder, see ``owned``
+    """
+
+    def create_record():
+        IdempotencyKey.objects.filter(
+            key=key, creation_datetime__lt=expiration_datetime()
+        ).delete()
+        return IdempotencyKey.objects.create(
+            key=key, path=path, request_hash=fingerprint
+        )
+
+    try:
+        return run_write(create_record)
+    except IntegrityError:
+        pass
+
+    now = timezone.now()
+    abandoned = IdempotencyKey.objects.filter(
+        key=key,
+        path=path,
+        request_hash=fingerprint,
+        status_code__isnull=True,
+        started_datetime__lt=now - timedelta(seconds=LEASE),
+    )
+    if run_write(lambda: abandoned.update(started_datetime=now)):
+        return IdempotencyKey.objects.filter(key=key, started_datetime=now).first()
+    return None
+
+
+def owned(record: IdempotencyKey):
+    """The record of the key while no retry has taken it over"""
+    return IdempotencyKey.objects.filter(
+        pk=record.pk,
+        started_datetime=record.started_datetime,
+        status_code__isnull=True,
+    )
+
+
+def replay(key: str, path: str, fingerprint: str) -> Response:
+    """Response stored for the key, waiting for it if the request is still running"""
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while True:
+        record = IdempotencyKey.objects.filter(key=key).first()
+        if record is None:
+            # The first request failed and released the key
+            return Response(
+                {"detail": _("The request with this Idempotency-Key failed, retry it")},
+                status=409,
+            )
+        if record.path != path or record.request_hash != fingerprint:
+            return Response(
+                {"detail": _("This Idempotency-Key was used for a different request")},
+                status=422,
+            )
+        if record.status_code is not None:
+            return Response(
+                record.response,
+                status=record.status_code,
+                headers={"Idempotent-Replayed": "true"},
+            )
+        if time.monotonic() >= deadline:
+            return Response(
+                {"detail": _("A request with this Idempotency-Key is in progress")},
+                status=409,
+            )
+        time.sleep(WAIT_INTERVAL)
+
+
+def store(record: IdempotencyKey, response: Response) -> None:
+    """
+    Save the response in the record, server errors release the key instead. Raises
+    KeyTakenOver when the key is no longer held by this request, so the transaction
+    of the view is rolled back
+    """
+    if response.status_code >= 500:
+        owned(record).delete()
+        return
+    if not owned(record).update(
+        status_code=response.status_code, response=response.data
+    ):
+        raise KeyTakenOver
+
+
+def idempotent(view_method):
+    """
+    Decorator for viewset methods. Requests without the header are handled as usual,
+    the view and the stored response are saved in the same database transaction
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"detail": _("Idempotency-Key must have at most 255 characters")},
+                status=400,
+            )
+
+        fingerprint = request_hash(request)
+        record = acquire(key, request.path, fingerprint)
+        if record is None:
+            return replay(key, request.path, fingerprint)
+
+        def execute():
+            try:
+                with transaction.atomic():
+                    response = view_method(self, request, *args, **kwargs)
+            except Exception as exc:
+                # Same handling as the view dispatch, unexpected errors are raised again
+                response = self.handle_exception(exc)
+            store(record, response)
+            return response
+
+        try:
+            return run_write(execute)
+        except KeyTakenOver:
+            return replay(key, request.path, fingerprint)
+        except BaseException:
+            run_write(lambda: owned(record).delete())
+            raise
+
+    return wrapper
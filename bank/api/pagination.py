@@ -0,0 +1,36 @@
+from collections import OrderedDict
+
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from ..pagination import CachedCountPaginator
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    Page number pagination that avoids running ``COUNT(*)`` on every request.
+    The response keeps the usual shape and adds ``count_is_approximate``
+    """
+
+    django_paginator_class = CachedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.page.paginator.count),
+                    ("count_is_approximate", self.page.paginator.approximate),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_is_approximate"] = {
+            "type": "boolean",
+            "example": False,
+        }
+        return response_schema
@@ -3,7 +3,7 @@ from django.utils.translation import ugettext_lazy as _
 from rest_flex_fields import FlexFieldsModelSerializer
 from rest_framework import serializers
 
-from ..models import Account, Customer, Transaction
+from ..models import Account, Customer, Job, JournalEntry, Transaction
 
 
 class CustomerSerializer(serializers.ModelSerializer):
@@ -70,3 +70,28 @@ class AccountSerializer(FlexFieldsModelSerializer):
         for income in income_transactions:
             Transaction.objects.create(receiver=account, **income)
         return account
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = (
+            "id",
+            "kind",
+            "status",
+            "progress",
+            "total",
+            "result",
+            "error",
+            "creation_datetime",
+            "started_datetime",
+            "finished_datetime",
+        )
+        read_only_fields = fields
+
+
+class JournalEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = JournalEntry
+        fields = ("sequence", "transaction", "origin", "receiver", "amount")
+        read_only_fields = fields
@@ -1,11 +1,22 @@
 from django.db.models import Q
+from django.utils.translation import ugettext_lazy as _
 
+from rest_framework import mixins, serializers, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_flex_fields.views import FlexFieldsModelViewSet
 
-from ..models import Account, Transaction
-from .serializers import AccountSerializer, TransactionSerializer
+from .. import jobs
+from ..db import serialized_write
+from ..models import Account, Job, JournalEntry, Transaction
+from .idempotency import idempotent
+from .serializers import (
+    AccountSerializer,
+    JobSerializer,
+    JournalEntrySerializer,
+    TransactionSerializer,
+)
 
 
 class AccountViewSet(FlexFieldsModelViewSet):
@@ -31,7 +42,14 @@ class AccountViewSet(FlexFieldsModelViewSet):
     ordering = ("-id",)
     permit_list_expands = ("incomes", "payments")
 
+    @idempotent
+    @serialized_write
+    def create(self, request, *args, **kwargs) -> Response:
+        return super().create(request, *args, **kwargs)
+
     @action(detail=True, methods=["post"])
+    @idempotent
+    @serialized_write
     def transfer_amount(self, request, pk) -> Response:
         """
         Creates a transaction between the requested account and another given in the POST data.
@@ -43,6 +61,36 @@ class AccountViewSet(FlexFieldsModelViewSet):
             serializer.save()
             return Response(serializer.data, status=201)
 
+    @action(detail=True, methods=["post"])
+    def batch_transfer(self, request, pk) -> Response:
+        """
+        Queues a list of transfers from the requested account, they are created in
+        background and their progress can be followed on the returned job url
+
+        {
+            "transfers": [
+                {"concept": "Rent", "amount": 700, "receiver": 2},
+                {"concept": "Gym", "amount": 40, "receiver": 3}
+            ]
+        }
+        """
+        account = self.get_object()
+        transfers = request.data.get("transfers")
+        if not transfers or not isinstance(transfers, list):
+            raise serializers.ValidationError(
+                {"transfers": _("You must specify at least one transfer")}
+            )
+        if not all(isinstance(transfer, dict) for transfer in transfers):
+            raise serializers.ValidationError(
+                {"transfers": _("Every transfer must be an object")}
+            )
+        job = jobs.enqueue(
+            "batch_transfer",
+            {"origin": account.pk, "transfers": transfers},
+            total=len(transfers),
+        )
+        return job_accepted_response(request, job)
+
     @action(detail=True)
     def balance(self, request, pk) -> Response:
         account = self.get_object()
@@ -64,3 +112,43 @@ class AccountViewSet(FlexFieldsModelViewSet):
         ).order_by("-creation_datetime")
         serializer = TransactionSerializer(transaction_history, many=True)
         return Response(serializer.data)
+
+
+def job_accepted_response(request, job: Job) -> Response:
+    url = reverse("bank:job-detail", kwargs={"pk": job.pk}, request=request)
+    return Response(
+        {"job": job.pk, "status": job.status, "url": url},
+        status=202,
+        headers={"Location": url},
+    )
+
+
+class JobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Status and progress of the background jobs queued by other endpoints
+    """
+
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+
+
+class JournalViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Journal entries after the sequence given in the `after` parameter, at most
+    `limit` of them. Consumers keep the last sequence received and ask for the
+    following entries with it
+    """
+
+    serializer_class = JournalEntrySerializer
+    pagination_class = None
+    max_limit = 1000
+
+    def get_queryset(self):
+        try:
+            after = int(self.request.query_params.get("after", 0))
+            limit = int(self.request.query_params.get("limit", self.max_limit))
+        except ValueError:
+            raise serializers.ValidationError(_("after and limit must be integers"))
+        limit = max(1, min(limit, self.max_limit))
+        entries = JournalEntry.objects.filter(sequence__gt=after).order_by("sequence")
+        return entries[:limit]
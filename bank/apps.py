@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class BankConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'bank'
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "bank"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .db import configure_sqlite
+
+        connection_created.connect(
+            configure_sqlite, dispatch_uid="bank_configure_sqlite"
+        )
@@ -0,0 +1,104 @@
+"""
+Database helpers for running on SQLite under concurrent writes.
+
+SQLite allows a single writer, so when ``BANK_SERIALIZE_WRITES`` is enabled the
+writes of this process are queued on a lock and retried when another process holds
+the database, up to ``BANK_WRITE_RETRIES`` times and ``BANK_WRITE_TIMEOUT`` seconds.
+"""
+import functools
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+SERIALIZE_WRITES = getattr(settings, "BANK_SERIALIZE_WRITES", False)
+WRITE_RETRIES = getattr(settings, "BANK_WRITE_RETRIES", 5)
+WRITE_RETRY_DELAY = 0.05
+
+# Seconds after which a write is not retried anymore. A last attempt can still take
+# up to the busy timeout of the connection
+WRITE_TIMEOUT = getattr(settings, "BANK_WRITE_TIMEOUT", 30)
+
+write_lock = threading.RLock()
+
+
+def configure_sqlite(sender, connection, **kwargs) -> None:
+    """``connection_created`` receiver that applies the ``BANK_SQLITE_PRAGMAS`` setting"""
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "BANK_SQLITE_PRAGMAS", {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def is_locked_error(exc: OperationalError) -> bool:
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+@contextmanager
+def write_slot(sqlite: bool, deadline: float):
+    """Hold the write lock of the process, waiting for it until the deadline"""
+    if not sqlite:
+        yield
+        return
+    if not write_lock.acquire(timeout=max(deadline - time.monotonic(), 0)):
+        raise OperationalError("database is locked, no write slot before the timeout")
+    try:
+        yield
+    finally:
+        write_lock.release()
+
+
+def run_write(func, using: str = DEFAULT_DB_ALIAS):
+    """
+    Run func in a transaction and return its result. Inside an outer transaction it
+    is just called, the outer one is the one that can be retried. The lock is not
+    held between attempts, so other threads can write while this one backs off
+    """
+    if not SERIALIZE_WRITES:
+        with transaction.atomic(using=using):
+            return func()
+    if transaction.get_connection(using).in_atomic_block:
+        return func()
+
+    sqlite = connections[using].vendor == "sqlite"
+    deadline = time.monotonic() + WRITE_TIMEOUT
+    for attempt in range(1, WRITE_RETRIES + 1):
+        try:
+            with write_slot(sqlite, deadline), transaction.atomic(using=using):
+                return func()
+        except OperationalError as exc:
+            # Jittered backoff, so the writers of other processes do not collide again
+            delay = WRITE_RETRY_DELAY * min(2 ** (attempt - 1), 16) * random.random()
+            if (
+                attempt == WRITE_RETRIES
+                or not is_locked_error(exc)
+                or time.monotonic() + delay >= deadline
+            ):
+                raise
+        time.sleep(delay)
+
+
+def serialized_write(view_method):
+    """Decorator for viewset methods that write, see ``run_write``"""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        return run_write(lambda: view_method(self, request, *args, **kwargs))
+
+    return wrapper
+
+
+def init_worker_process() -> None:
+    """
+    Initializer for process pools. Spawned workers start without Django configured
+    and forked ones inherit the parent connections, which must not be shared
+    """
+    django.setup()
+    connections.close_all()
@@ -0,0 +1,150 @@
+"""
+Database backed job queue.
+
+Endpoints enqueue work with ``enqueue`` and answer straight away, the ``run_jobs``
+management command picks pending jobs and runs them in a pool of worker threads.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .db import run_write
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+# Seconds without progress after which a running job is taken as abandoned
+STALE_TIMEOUT = getattr(settings, "BANK_JOB_STALE_TIMEOUT", 10 * 60)
+
+
+def register(kind: str):
+    """Register the decorated function as the handler for jobs of the given kind"""
+
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+
+    return decorator
+
+
+def enqueue(kind: str, payload: dict, total: int = 0) -> Job:
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    return Job.objects.create(kind=kind, payload=payload, total=total)
+
+
+def set_progress(job: Job, progress: int, result: dict = None) -> None:
+    """
+    Store the progress, and the partial result when given, so they are kept if the
+    job does not finish. It also works as the heartbeat of the job
+    """
+    job.progress = progress
+    fields = {"progress": progress, "modification_datetime": timezone.now()}
+    if result is not None:
+        fields["result"] = result
+    run_write(lambda: Job.objects.filter(pk=job.pk).update(**fields))
+
+
+def claim(job_id: int) -> bool:
+    """
+    Mark a pending job as running. The conditional update makes sure only one
+    worker gets the job even if several of them see it as pending
+    """
+    now = timezone.now()
+    claimed = Job.objects.filter(pk=job_id, status=Job.PENDING)
+    return bool(
+        run_write(
+            lambda: claimed.update(
+                status=Job.RUNNING, started_datetime=now, modification_datetime=now
+            )
+        )
+    )
+
+
+def fail_stale_jobs() -> int:
+    """
+    Mark as failed the running jobs without progress for STALE_TIMEOUT seconds,
+    their worker died. They are not queued again because part of their work may be
+    saved already, their partial result is kept
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        modification_datetime__lt=now - timedelta(seconds=STALE_TIMEOUT),
+    )
+    return run_write(
+        lambda: stale.update(
+            status=Job.FAILED,
+            error="The worker stopped before finishing the job",
+            finished_datetime=now,
+        )
+    )
+
+
+def finish(job_id: int, **fields) -> None:
+    fields["finished_datetime"] = timezone.now()
+    run_write(lambda: Job.objects.filter(pk=job_id).update(**fields))
+
+
+def run_job(job_id: int) -> None:
+    """
+    Claim and run a pending job. Errors saving the job state are raised, the caller
+    must report them because the job is left running
+    """
+    if not claim(job_id):
+        return
+    job = Job.objects.get(pk=job_id)
+    try:
+        result = HANDLERS[job.kind](job)
+    except Exception:
+        logger.exception("Job %s failed", job_id)
+        finish(job_id, status=Job.FAILED, error=traceback.format_exc())
+    else:
+        finish(
+            job_id, status=Job.DONE, result=result, progress=job.total or job.progress
+        )
+
+
+def pending_jobs(limit: int = None) -> list:
+    job_ids = Job.objects.filter(status=Job.PENDING).values_list("id", flat=True)
+    if limit:
+        job_ids = job_ids[:limit]
+    return list(job_ids)
+
+
+@register("batch_transfer")
+def batch_transfer(job: Job) -> dict:
+    """
+    Creates every transfer listed in the payload from the origin account.
+    Each transfer is validated and saved on its own, so a rejected one does not
+    discard the rest
+    """
+    from .api.serializers import TransactionSerializer
+
+    origin = job.payload["origin"]
+
+    def create_transfer(transfer):
+        # Validation and save share the write transaction so the balance can not
+        # change in between
+        serializer = TransactionSerializer(data={**transfer, "origin": origin})
+        if serializer.is_valid():
+            return serializer.save().pk, None
+        return None, serializer.errors
+
+    created, errors = [], {}
+    for index, transfer in enumerate(job.payload["transfers"], start=1):
+        if isinstance(transfer, dict):
+            pk, transfer_errors = run_write(lambda: create_transfer(transfer))
+        else:
+            pk, transfer_errors = None, {"non_field_errors": ["Must be an object"]}
+        if transfer_errors:
+            errors[index - 1] = transfer_errors
+        else:
+            created.append(pk)
+        set_progress(job, index, result={"created": created, "errors": errors})
+    return {"created": created, "errors": errors}
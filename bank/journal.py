@@ -0,0 +1,147 @@
+"""
+Readers of the transactions journal.
+
+Consumers tail the journal from the last sequence they processed, and account
+balances are rebuilt by adding the entries in sequence order into a memory mapped
+array of doubles indexed by account id.
+"""
+import mmap
+import os
+import struct
+
+from django.db.models import Max
+
+from .models import JournalEntry, JournalOffset
+
+# Balances file layout: last replayed sequence followed by one double per account id
+HEADER = struct.Struct("<q")
+BALANCE_SIZE = struct.calcsize("d")
+
+
+def read(after: int = 0, limit: int = 1000) -> list:
+    """Journal entries with a sequence greater than after, in order"""
+    entries = JournalEntry.objects.filter(sequence__gt=after).order_by("sequence")
+    return list(entries[:limit])
+
+
+def get_offset(consumer: str) -> int:
+    offset = JournalOffset.objects.filter(consumer=consumer).first()
+    return offset.sequence if offset else 0
+
+
+def set_offset(consumer: str, sequence: int) -> None:
+    JournalOffset.objects.update_or_create(
+        consumer=consumer, defaults={"sequence": sequence}
+    )
+
+
+def tail(consumer: str, batch_size: int = 1000):
+    """
+    Yield batches of the entries the consumer has not processed yet. The offset of
+    a batch is stored when the next one is requested, so an interrupted consumer
+    gets again the batch it was processing
+    """
+    offset = get_offset(consumer)
+    while True:
+        batch = read(offset, batch_size)
+        if not batch:
+            return
+        yield batch
+        offset = batch[-1].sequence
+        set_offset(consumer, offset)
+
+
+class Balances:
+    """
+    Account balances backed by a memory mapped file, or by anonymous memory when
+    no path is given. The file keeps the last replayed sequence, so a replay can
+    resume from it
+    """
+
+    def __init__(self, path: str = None, accounts: int = 0):
+        size = HEADER.size + (accounts + 1) * BALANCE_SIZE
+        if path:
+            self.file = open(path, "r+b" if os.path.exists(path) else "w+b")
+            size = max(size, os.fstat(self.file.fileno()).st_size)
+            self.file.truncate(size)
+            self.map = mmap.mmap(self.file.fileno(), size)
+        else:
+            self.file = None
+            self.map = mmap.mmap(-1, size)
+        self.view = memoryview(self.map)
+        self.values = self.view[HEADER.size :].cast("d")
+
+    @property
+    def sequence(self) -> int:
+        return HEADER.unpack_from(self.map)[0]
+
+    @sequence.setter
+    def sequence(self, value: int) -> None:
+        HEADER.pack_into(self.map, 0, value)
+
+    def __getitem__(self, account_id: int) -> float:
+        if account_id >= len(self.values):
+            return 0.0
+        return self.values[account_id]
+
+    def items(self):
+        """Accounts with a balance, as (account_id, balance) pairs"""
+        return ((pk, value) for pk, value in enumerate(self.values) if value)
+
+    def close(self) -> None:
+        self.values.release()
+        self.view.release()
+        self.map.flush()
+        self.map.close()
+        if self.file:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def replay(balances: Balances, until: int, batch_size: int = 100000) -> int:
+    """
+    Add the entries after balances.sequence up to the until sequence to the balances
+    and return how many were replayed. Entries are read by sequence, the primary
+    key, so no sort is needed
+    """
+    replayed = 0
+    values = balances.values
+    while balances.sequence < until:
+        entries = (
+            JournalEntry.objects.filter(
+                sequence__gt=balances.sequence, sequence__lte=until
+            )
+            .order_by("sequence")
+            .values_list("sequence", "origin_id", "receiver_id", "amount")
+        )
+        entries = list(entries[:batch_size])
+        if not entries:
+            break
+        for sequence, origin_id, receiver_id, amount in entries:
+            if receiver_id is not None:
+                values[receiver_id] += amount
+            if origin_id is not None:
+                values[origin_id] -= amount
+        balances.sequence = entries[-1][0]
+        replayed += len(entries)
+    return replayed
+
+
+def last_sequence() -> int:
+    return JournalEntry.objects.aggregate(last=Max("sequence"))["last"] or 0
+
+
+def max_account_id() -> int:
+    """
+    Highest account id in the journal, the foreign key indexes make it cheap. Read
+    it after last_sequence, so it covers every entry up to that sequence
+    """
+    bounds = JournalEntry.objects.aggregate(
+        origin=Max("origin"), receiver=Max("receiver")
+    )
+    return max(bounds["origin"] or 0, bounds["receiver"] or 0)
@@ -0,0 +1,107 @@
+"""
+Ledger integrity checks.
+
+The transaction table is split in id ranges that are scanned independently, every
+chunk returns per account partial results that are merged afterwards in id order.
+"""
+from collections import defaultdict
+
+from django.db.models import Max, Min
+
+from .models import Transaction
+
+# Tolerance used when comparing float balances
+EPSILON = 0.005
+
+
+def id_ranges(first_id: int, last_id: int, chunk_size: int) -> list:
+    """Split [first_id, last_id] in consecutive closed ranges of chunk_size ids"""
+    return [
+        (start, min(start + chunk_size - 1, last_id))
+        for start in range(first_id, last_id + 1, chunk_size)
+    ]
+
+
+def transaction_id_bounds() -> tuple:
+    bounds = Transaction.objects.aggregate(first=Min("id"), last=Max("id"))
+    return bounds["first"], bounds["last"]
+
+
+def scan_chunk(id_range: tuple) -> dict:
+    """
+    Scan the transactions of an id range in order.
+
+    For every account it returns the net amount moved in the chunk and the lowest
+    running balance reached inside it, relative to the balance at the chunk start.
+    Rows without origin and receiver, or with the same account on both sides, are
+    reported as invalid
+    """
+    start, end = id_range
+    net = defaultdict(float)
+    lowest = {}
+    orphans, self_transfers = [], []
+    rows = (
+        Transaction.objects.filter(id__gte=start, id__lte=end)
+        .order_by("id")
+        .values_list("id", "origin_id", "receiver_id", "amount")
+    )
+    for pk, origin_id, receiver_id, amount in rows.iterator(chunk_size=2000):
+        if origin_id is None and receiver_id is None:
+            orphans.append(pk)
+            continue
+        if origin_id == receiver_id:
+            self_transfers.append(pk)
+            continue
+        if receiver_id is not None:
+            net[receiver_id] += amount
+        if origin_id is not None:
+            balance = net[origin_id] - amount
+            net[origin_id] = balance
+            if balance < lowest.get(origin_id, 0):
+                lowest[origin_id] = balance
+    return {
+        "net": dict(net),
+        "lowest": lowest,
+        "orphans": orphans,
+        "self_transfers": self_transfers,
+    }
+
+
+class Reconciliation:
+    """Accumulates chunk results, they must be added in id order"""
+
+    def __init__(self):
+        self.balances = defaultdict(float)
+        self.lowest = {}
+        self.orphans = []
+        self.self_transfers = []
+
+    def add(self, chunk: dict) -> None:
+        for account_id, chunk_lowest in chunk["lowest"].items():
+            reached = self.balances[account_id] + chunk_lowest
+            if reached < self.lowest.get(account_id, 0):
+                self.lowest[account_id] = reached
+        for account_id, amount in chunk["net"].items():
+            self.balances[account_id] += amount
+        self.orphans.extend(chunk["orphans"])
+        self.self_transfers.extend(chunk["self_transfers"])
+
+    @property
+    def negative_accounts(self) -> dict:
+        """Accounts whose running balance went below zero and the lowest value reached"""
+        return {
+            account_id: lowest
+            for account_id, lowest in self.lowest.items()
+            if lowest < -EPSILON
+        }
+
+
+def compare_balances(balances: dict, expected: dict) -> dict:
+    """Return {account_id: (expected, computed)} for every mismatching account"""
+    mismatches = {}
+    for account_id in set(balances) | set(expected):
+        computed = balances.get(account_id, 0)
+        stored = expected.get(account_id, 0)
+        if abs(computed - stored) > EPSILON:
+            mismatches[account_id] = (stored, computed)
+    return mismatches
@@ -0,0 +1,136 @@
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+
+from ...api.serializers import TransactionSerializer
+from ...db import init_worker_process, run_write
+from ...models import Account, Customer, Transaction
+
+
+def _use_database(name: str) -> None:
+    connections[DEFAULT_DB_ALIAS].settings_dict["NAME"] = name
+
+
+def _init_worker(name: str) -> None:
+    """Spawned workers load the settings again, point them to the benchmark file"""
+    init_worker_process()
+    _use_database(name)
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Temporary copy of the default database settings on an empty SQLite file, so
+    the throwaway transfers never reach the real ledger and its journal
+    """
+    if connections[DEFAULT_DB_ALIAS].vendor != "sqlite":
+        raise CommandError("The benchmark only runs on SQLite")
+    name = connections[DEFAULT_DB_ALIAS].settings_dict["NAME"]
+    directory = tempfile.mkdtemp(prefix="benchmark-")
+    path = os.path.join(directory, "benchmark.sqlite3")
+    connections.close_all()
+    _use_database(path)
+    try:
+        call_command("migrate", verbosity=0, interactive=False)
+        yield path
+    finally:
+        connections.close_all()
+        _use_database(name)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _transfer(account_ids: list) -> bool:
+    """Same validation and write as the transfer_amount endpoint"""
+    origin, receiver = random.sample(account_ids, 2)
+
+    def create():
+        serializer = TransactionSerializer(
+            data={"origin": origin, "receiver": receiver, "amount": 1}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    try:
+        run_write(create)
+    except OperationalError:
+        return False
+    return True
+
+
+def _run_thread(account_ids: list, transfers: int) -> int:
+    try:
+        return sum(_transfer(account_ids) for transfer in range(transfers))
+    finally:
+        connection.close()
+
+
+def _run_process(account_ids: list, threads: int, transfers: int) -> int:
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(_run_thread, account_ids, transfers)
+            for thread in range(threads)
+        ]
+    return sum(future.result() for future in futures)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the transfers per second written by concurrent processes and threads "
+        "on a temporary copy of the database. Run it with each DATABASE_PROFILE to "
+        "compare them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=4)
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument(
+            "--transfers", type=int, default=100, help="Transfers made by each thread"
+        )
+        parser.add_argument("--accounts", type=int, default=20)
+
+    def handle(self, *args, **options):
+        processes, threads = options["processes"], options["threads"]
+        attempted = processes * threads * options["transfers"]
+        with benchmark_database() as path:
+            account_ids = self.create_accounts(options["accounts"])
+            connections.close_all()
+            start = time.perf_counter()
+            with ProcessPoolExecutor(
+                max_workers=processes, initializer=_init_worker, initargs=(path,)
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _run_process, account_ids, threads, options["transfers"]
+                    )
+                    for process in range(processes)
+                ]
+            written = sum(future.result() for future in futures)
+            elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"Profile {settings.DATABASE_PROFILE}: {written}/{attempted} transfers in "
+            f"{elapsed:.2f}s, {written / elapsed:.1f} writes/sec, "
+            f"{attempted - written} failed with database errors"
+        )
+
+    def create_accounts(self, count: int) -> list:
+        owner = Customer.objects.create(name="Benchmark")
+        Account.objects.bulk_create(
+            Account(identifier=f"BENCHMARK-{number}", owner=owner)
+            for number in range(count)
+        )
+        account_ids = list(Account.objects.values_list("id", flat=True))
+        Transaction.objects.bulk_create(
+            Transaction(amount=1000000, receiver_id=account_id)
+            for account_id in account_ids
+        )
+        return account_ids
@@ -0,0 +1,120 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ...db import init_worker_process
+from ...ledger import (
+    Reconciliation,
+    compare_balances,
+    id_ranges,
+    scan_chunk,
+    transaction_id_bounds,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every account balance from the transactions and report negative "
+        "balances, invalid transactions and differences against a snapshot"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--chunk-size", type=int, default=100000)
+        parser.add_argument(
+            "--snapshot",
+            help="JSON file with the balances to compare with, as written by --write-snapshot",
+        )
+        parser.add_argument(
+            "--write-snapshot",
+            help="Store the computed balances in the given JSON file",
+        )
+
+    def handle(self, *args, **options):
+        first_id, last_id = transaction_id_bounds()
+        if first_id is None:
+            self.stdout.write("There are no transactions to reconcile")
+            return
+
+        snapshot = None
+        ranges = id_ranges(first_id, last_id, options["chunk_size"])
+        if options["snapshot"]:
+            with open(options["snapshot"]) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            # Split the ranges at the snapshot so the balances at that point are known
+            snapshot_id = snapshot["last_transaction"]
+            ranges = id_ranges(
+                first_id, min(snapshot_id, last_id), options["chunk_size"]
+            ) + id_ranges(snapshot_id + 1, last_id, options["chunk_size"])
+            snapshot_chunks = sum(1 for start, end in ranges if end <= snapshot_id)
+
+        executor = None
+        if options["workers"] > 1:
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=init_worker_process
+            )
+            chunks = executor.map(scan_chunk, ranges)
+        else:
+            chunks = map(scan_chunk, ranges)
+
+        reconciliation = Reconciliation()
+        snapshot_balances = {}
+        try:
+            for index, chunk in enumerate(chunks, start=1):
+                reconciliation.add(chunk)
+                if snapshot and index == snapshot_chunks:
+                    snapshot_balances = dict(reconciliation.balances)
+        finally:
+            if executor:
+                executor.shutdown()
+
+        discrepancies = self.report(reconciliation, snapshot, snapshot_balances)
+
+        if options["write_snapshot"]:
+            with open(options["write_snapshot"], "w") as snapshot_file:
+                json.dump(
+                    {
+                        "last_transaction": last_id,
+                        "balances": reconciliation.balances,
+                    },
+                    snapshot_file,
+                )
+
+        if discrepancies:
+            raise CommandError(f"{discrepancies} discrepancies found")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ledger consistent: {len(reconciliation.balances)} accounts, "
+                f"transactions {first_id} to {last_id}"
+            )
+        )
+
+    def report(self, reconciliation, snapshot, snapshot_balances) -> int:
+        discrepancies = 0
+        for account_id, lowest in sorted(reconciliation.negative_accounts.items()):
+            self.stdout.write(
+                f"Account {account_id} balance went negative, down to {lowest:.2f}"
+            )
+            discrepancies += 1
+        for pk in reconciliation.orphans:
+            self.stdout.write(f"Transaction {pk} has neither origin nor receiver")
+            discrepancies += 1
+        for pk in reconciliation.self_transfers:
+            self.stdout.write(f"Transaction {pk} has the same origin and receiver")
+            discrepancies += 1
+        if snapshot:
+            expected = {
+                int(account_id): amount
+                for account_id, amount in snapshot["balances"].items()
+            }
+            mismatches = compare_balances(snapshot_balances, expected)
+            for account_id, (stored, computed) in sorted(mismatches.items()):
+                self.stdout.write(
+                    f"Account {account_id} balance is {computed:.2f}, "
+                    f"snapshot says {stored:.2f}"
+                )
+                discrepancies += 1
+        return discrepancies
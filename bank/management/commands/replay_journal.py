@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...journal import Balances, last_sequence, max_account_id, replay
+
+
+class Command(BaseCommand):
+    help = "Rebuild every account balance from the transactions journal"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help=(
+                "Memory mapped balances file. If it exists the replay resumes from "
+                "the last sequence stored in it"
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=100000)
+        parser.add_argument(
+            "--show", action="store_true", help="Print the balance of every account"
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        until = last_sequence()
+        with Balances(options["output"], accounts=max_account_id()) as balances:
+            first_sequence = balances.sequence
+            replayed = replay(balances, until, batch_size=options["batch_size"])
+            if options["show"]:
+                for account_id, balance in balances.items():
+                    self.stdout.write(f"Account {account_id}: {balance:.2f}")
+            if not replayed:
+                self.stdout.write(
+                    f"Balances up to date at sequence {balances.sequence}"
+                )
+                return
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Replayed {replayed} entries, sequences {first_sequence + 1} to "
+                    f"{balances.sequence}, in {time.perf_counter() - start:.2f}s"
+                )
+            )
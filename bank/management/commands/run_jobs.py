@@ -0,0 +1,75 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from ...jobs import fail_stale_jobs, pending_jobs, run_job
+
+logger = logging.getLogger(__name__)
+
+
+def _run_in_thread(job_id: int) -> None:
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs in a pool of worker threads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs pending right now and exit",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        self.fail_stale_jobs()
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            if options["once"]:
+                for job_id in pending_jobs():
+                    running[executor.submit(_run_in_thread, job_id)] = job_id
+                    self.stdout.write(f"Started job {job_id}")
+                executor.shutdown()
+                for future, job_id in running.items():
+                    self.check_finished(future, job_id)
+                return
+            while True:
+                for future, job_id in list(running.items()):
+                    if future.done():
+                        self.check_finished(future, job_id)
+                        del running[future]
+                free_slots = workers - len(running)
+                job_ids = pending_jobs(limit=free_slots) if free_slots > 0 else []
+                for job_id in job_ids:
+                    running[executor.submit(_run_in_thread, job_id)] = job_id
+                    self.stdout.write(f"Started job {job_id}")
+                if not job_ids:
+                    self.fail_stale_jobs()
+                    time.sleep(options["poll_interval"])
+
+    def check_finished(self, future, job_id: int) -> None:
+        """Report the errors that left a job without its final status"""
+        exc = future.exception()
+        if exc is not None:
+            logger.error("Job %s could not be finished", job_id, exc_info=exc)
+            self.stderr.write(f"Job {job_id} could not be finished: {exc}")
+
+    def fail_stale_jobs(self) -> None:
+        failed = fail_stale_jobs()
+        if failed:
+            self.stdout.write(f"Marked {failed} abandoned jobs as failed")
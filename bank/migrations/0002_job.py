@@ -0,0 +1,44 @@
+# Generated by Django 3.2.14 on 2026-10-19 20:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django_currentuser.db.models.fields
+import django_currentuser.middleware
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bank', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='account',
+            options={'ordering': ['-id']},
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creation_datetime', models.DateTimeField(auto_now_add=True, verbose_name='Creation date')),
+                ('modification_datetime', models.DateTimeField(auto_now=True, verbose_name='Modification date')),
+                ('kind', models.CharField(max_length=50, verbose_name='Kind')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10, verbose_name='Status')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Payload')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Result')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('progress', models.PositiveIntegerField(default=0, verbose_name='Progress')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('started_datetime', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Start date')),
+                ('finished_datetime', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Finish date')),
+                ('creation_user', django_currentuser.db.models.fields.CurrentUserField(blank=True, default=django_currentuser.middleware.get_current_authenticated_user, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bank_job_creations', to=settings.AUTH_USER_MODEL, verbose_name='Creation user')),
+                ('modification_user', django_currentuser.db.models.fields.CurrentUserField(default=django_currentuser.middleware.get_current_authenticated_user, null=True, on_delete=django.db.models.deletion.PROTECT, on_update=True, related_name='bank_job_modifications', to=settings.AUTH_USER_MODEL, verbose_name='Modification user')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.14 on 2026-10-19 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0002_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='Key')),
+                ('path', models.CharField(max_length=255, verbose_name='Path')),
+                ('request_hash', models.CharField(max_length=32, verbose_name='Request hash')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Status code')),
+                ('response', models.JSONField(blank=True, null=True, verbose_name='Response')),
+                ('creation_datetime', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Creation date')),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.14 on 2026-10-19 20:29
+
+from django.db import migrations, models
+
+
+def check_transactions_without_account(apps, schema_editor):
+    """
+    The previous check let through rows without origin and receiver. They would
+    make the table rebuild fail, so stop before it listing them
+    """
+    Transaction = apps.get_model("bank", "Transaction")
+    invalid_ids = list(
+        Transaction.objects.filter(origin__isnull=True, receiver__isnull=True)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    if invalid_ids:
+        raise RuntimeError(
+            f"{len(invalid_ids)} transactions have neither origin nor receiver, set "
+            f"one of them or delete them before migrating. Ids: "
+            f"{', '.join(map(str, invalid_ids))}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0003_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            check_transactions_without_account, migrations.RunPython.noop
+        ),
+        migrations.RemoveConstraint(
+            model_name='transaction',
+            name='origin_or_receiver_required',
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.CheckConstraint(check=models.Q(('origin__isnull', False), ('receiver__isnull', False), _connector='OR'), name='origin_or_receiver_required'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.2.14 on 2026-10-19 20:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def journal_existing_transactions(apps, schema_editor):
+    Transaction = apps.get_model("bank", "Transaction")
+    JournalEntry = apps.get_model("bank", "JournalEntry")
+    transactions = (
+        Transaction.objects.order_by("id")
+        .values_list("id", "origin_id", "receiver_id", "amount")
+        .iterator(chunk_size=10000)
+    )
+    batch = []
+    for transaction_id, origin_id, receiver_id, amount in transactions:
+        batch.append(
+            JournalEntry(
+                transaction_id=transaction_id,
+                origin_id=origin_id,
+                receiver_id=receiver_id,
+                amount=amount,
+            )
+        )
+        if len(batch) == 10000:
+            JournalEntry.objects.bulk_create(batch)
+            batch = []
+    JournalEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0004_fix_origin_or_receiver_required'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalOffset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consumer', models.CharField(max_length=100, unique=True, verbose_name='Consumer')),
+                ('sequence', models.BigIntegerField(default=0, verbose_name='Sequence')),
+                ('modification_datetime', models.DateTimeField(auto_now=True, verbose_name='Modification date')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JournalEntry',
+            fields=[
+                ('sequence', models.BigAutoField(primary_key=True, serialize=False, verbose_name='Sequence')),
+                ('amount', models.FloatField(verbose_name='Amount')),
+                ('creation_datetime', models.DateTimeField(auto_now_add=True, verbose_name='Creation date')),
+                ('origin', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='bank.account', verbose_name='Origin')),
+                ('receiver', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='bank.account', verbose_name='Receiver')),
+                ('transaction', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='bank.transaction', verbose_name='Transaction')),
+            ],
+            options={
+                'verbose_name_plural': 'Journal entries',
+                'ordering': ['sequence'],
+            },
+        ),
+        migrations.RunPython(journal_existing_transactions, migrations.RunPython.noop),
+    ]
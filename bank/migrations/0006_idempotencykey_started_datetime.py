@@ -0,0 +1,19 @@
+# Generated by Django 3.2.14 on 2026-10-19 20:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank', '0005_journal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='started_datetime',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Start date'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.transaction import atomic
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 from django_currentuser.db.models import CurrentUserField
@@ -110,7 +112,7 @@ class Transaction(Authorable):
         constraints = [
             models.CheckConstraint(
                 name="origin_or_receiver_required",
-                check=models.Q(origin=True) | models.Q(receiver=True),
+                check=models.Q(origin__isnull=False) | models.Q(receiver__isnull=False),
             )
         ]
 
@@ -119,3 +121,189 @@ class Transaction(Authorable):
         if self.concept:
             str_value += f" Concept: {self.concept}"
         return str_value
+
+    def save(self, *args, **kwargs):
+        """Every change of the moved amount is appended to the journal in the same transaction"""
+        with atomic(using=kwargs.get("using")):
+            previous = None
+            if self.pk:
+                previous = (
+                    Transaction.objects.filter(pk=self.pk)
+                    .values("origin_id", "receiver_id", "amount")
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            JournalEntry.record(self, previous)
+
+
+class Job(Authorable):
+    """
+    Background work queued from the API and executed by the ``run_jobs`` worker pool
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, _("Pending")),
+        (RUNNING, _("Running")),
+        (DONE, _("Done")),
+        (FAILED, _("Failed")),
+    )
+
+    kind = models.CharField(verbose_name=_("Kind"), max_length=50)
+    status = models.CharField(
+        verbose_name=_("Status"),
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        db_index=True,
+    )
+    payload = models.JSONField(verbose_name=_("Payload"), default=dict, blank=True)
+    result = models.JSONField(verbose_name=_("Result"), blank=True, null=True)
+    error = models.TextField(verbose_name=_("Error"), blank=True)
+    progress = models.PositiveIntegerField(verbose_name=_("Progress"), default=0)
+    total = models.PositiveIntegerField(verbose_name=_("Total"), default=0)
+    started_datetime = models.DateTimeField(
+        _("Start date"), blank=True, null=True, editable=False
+    )
+    finished_datetime = models.DateTimeField(
+        _("Finish date"), blank=True, null=True, editable=False
+    )
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response given to a request sent with an ``Idempotency-Key`` header, retries with
+    the same key get it back instead of running the request again
+    """
+
+    key = models.CharField(verbose_name=_("Key"), max_length=255, unique=True)
+    path = models.CharField(verbose_name=_("Path"), max_length=255)
+    request_hash = models.CharField(verbose_name=_("Request hash"), max_length=32)
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name=_("Status code"), blank=True, null=True
+    )
+    response = models.JSONField(verbose_name=_("Response"), blank=True, null=True)
+    creation_datetime = models.DateTimeField(
+        _("Creation date"), auto_now_add=True, db_index=True
+    )
+    # Start of the request that holds the key, refreshed when another one takes it
+    started_datetime = models.DateTimeField(_("Start date"), default=timezone.now)
+
+    def __str__(self) -> str:
+        return self.key
+
+
+class JournalQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise TypeError("Journal entries can not be updated")
+
+    def delete(self):
+        raise TypeError("Journal entries can not be deleted")
+
+
+class JournalEntry(models.Model):
+    """
+    Append-only record of the amounts moved by the transactions. Changes and
+    deletions of a transaction append a reversal entry with the negated amount, so
+    the balances can be rebuilt by adding the entries in sequence order.
+    Bulk operations on transactions (bulk_create, QuerySet.update) skip the journal
+    """
+
+    sequence = models.BigAutoField(verbose_name=_("Sequence"), primary_key=True)
+    transaction = models.ForeignKey(
+        Transaction,
+        verbose_name=_("Transaction"),
+        related_name="+",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+    origin = models.ForeignKey(
+        Account,
+        verbose_name=_("Origin"),
+        related_name="+",
+        blank=True,
+        null=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+    receiver = models.ForeignKey(
+        Account,
+        verbose_name=_("Receiver"),
+        related_name="+",
+        blank=True,
+        null=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+    amount = models.FloatField(verbose_name=_("Amount"))
+    creation_datetime = models.DateTimeField(
+        _("Creation date"), auto_now_add=True, editable=False
+    )
+
+    objects = JournalQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["sequence"]
+        verbose_name_plural = _("Journal entries")
+
+    def __str__(self) -> str:
+        return f"#{self.sequence} Amount: {self.amount}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError("Journal entries can not be updated")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("Journal entries can not be deleted")
+
+    @classmethod
+    def record(cls, transaction: Transaction, previous: dict = None) -> None:
+        """
+        Append the entries for a saved transaction, previous are its origin, receiver
+        and amount before the save when it already existed
+        """
+        current = {
+            "origin_id": transaction.origin_id,
+            "receiver_id": transaction.receiver_id,
+            "amount": transaction.amount,
+        }
+        if previous == current:
+            return
+        if previous:
+            cls.objects.create(
+                transaction_id=transaction.pk,
+                origin_id=previous["origin_id"],
+                receiver_id=previous["receiver_id"],
+                amount=-previous["amount"],
+            )
+        cls.objects.create(transaction_id=transaction.pk, **current)
+
+    @classmethod
+    def record_deletion(cls, transaction: Transaction) -> None:
+        cls.objects.create(
+            transaction_id=transaction.pk,
+            origin_id=transaction.origin_id,
+            receiver_id=transaction.receiver_id,
+            amount=-transaction.amount,
+        )
+
+
+class JournalOffset(models.Model):
+    """Last journal sequence processed by each consumer"""
+
+    consumer = models.CharField(verbose_name=_("Consumer"), max_length=100, unique=True)
+    sequence = models.BigIntegerField(verbose_name=_("Sequence"), default=0)
+    modification_datetime = models.DateTimeField(_("Modification date"), auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.consumer}: {self.sequence}"
@@ -0,0 +1,139 @@
+"""
+Pagination helpers for big tables, where an exact ``COUNT(*)`` costs as much as the
+page itself
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, Paginator, PageNotAnInteger
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+from django.utils.translation import ugettext_lazy as _
+
+# Below this number of rows the exact count is cheap enough to be used
+ESTIMATED_COUNT_THRESHOLD = getattr(settings, "BANK_ESTIMATED_COUNT_THRESHOLD", 10000)
+
+# Seconds an exact count is reused for the same filters
+COUNT_CACHE_TIMEOUT = getattr(settings, "BANK_COUNT_CACHE_TIMEOUT", 30)
+
+
+def estimate_count(queryset):
+    """
+    Cheap approximation of the rows of an unfiltered queryset, without scanning the
+    table. Returns None when there is no estimate for the given queryset
+    """
+    query = getattr(queryset, "query", None)
+    if query is None or query.where or query.distinct or query.is_sliced:
+        return None
+
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+        return None
+
+    # Elsewhere the primary key span is read from the index, deleted rows make it
+    # overestimate a little
+    bounds = queryset.model._default_manager.using(queryset.db).aggregate(
+        first=Min("pk"), last=Max("pk")
+    )
+    if bounds["first"] is None:
+        return 0
+    return bounds["last"] - bounds["first"] + 1
+
+
+class EstimatedCountPage(Page):
+    """Page that knows if there are more rows without relying on the paginator count"""
+
+    def __init__(self, object_list, number, paginator, has_more: bool):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self) -> bool:
+        return self.has_more
+
+    def end_index(self) -> int:
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses an estimated count for big unfiltered querysets. The count is
+    only informative, pages are sliced from their number and one extra row tells if
+    there is a next page, so a stale or low count never hides rows
+    """
+
+    threshold = ESTIMATED_COUNT_THRESHOLD
+    approximate = False
+
+    @cached_property
+    def count(self) -> int:
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate > self.threshold:
+            self.approximate = True
+            return estimate
+        return self.exact_count()
+
+    def exact_count(self) -> int:
+        return super().count
+
+    def validate_number(self, number) -> int:
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_("That page number is not an integer"))
+        if number < 1:
+            raise EmptyPage(_("That page number is less than 1"))
+        return number
+
+    def page(self, number) -> EstimatedCountPage:
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows and (number > 1 or not self.allow_empty_first_page):
+            raise EmptyPage(_("That page contains no results"))
+        return EstimatedCountPage(
+            rows[: self.per_page], number, self, has_more=len(rows) > self.per_page
+        )
+
+
+def count_cache_key(queryset):
+    """Cache key for the count of a queryset, the same for every ordering and page"""
+    query = getattr(queryset, "query", None)
+    if query is None:
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    signature = hashlib.md5(f"{queryset.db}:{sql}:{params}".encode()).hexdigest()
+    return f"bank:count:{queryset.model._meta.label_lower}:{signature}"
+
+
+class CachedCountPaginator(EstimatedCountPaginator):
+    """
+    Estimated count paginator that also caches the exact counts for a short time,
+    keyed by the filters of the queryset. A count read from the cache may be stale,
+    so it is marked as approximate
+    """
+
+    timeout = COUNT_CACHE_TIMEOUT
+
+    def exact_count(self) -> int:
+        key = count_cache_key(self.object_list)
+        if key is None:
+            return super().exact_count()
+        count = cache.get(key)
+        if count is not None:
+            self.approximate = True
+            return count
+        count = super().exact_count()
+        cache.set(key, count, self.timeout)
+        return count
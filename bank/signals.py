@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import JournalEntry, Transaction
+
+
+@receiver(post_delete, sender=Transaction, dispatch_uid="bank_journal_deletion")
+def journal_deletion(sender, instance, **kwargs):
+    """Deletions run inside the transaction opened by the deletion collector"""
+    JournalEntry.record_deletion(instance)
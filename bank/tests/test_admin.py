@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from django_currentuser.middleware import _set_current_user
+
+from ..models import Account, Customer, Transaction
+from ..pagination import EstimatedCountPaginator, estimate_count
+
+
+class AdminTests(TestCase):
+    fixtures = ["customers"]
+
+    def setUp(self):
+        """Account test data"""
+        first_account, created = Account.objects.get_or_create(
+            identifier="ES12 1111 11111", owner=Customer.objects.first()
+        )
+        second_account, created = Account.objects.get_or_create(
+            identifier="ES12 3456 78910", owner=Customer.objects.first()
+        )
+        Transaction.objects.get_or_create(amount=5000, receiver=first_account)
+        Transaction.objects.get_or_create(amount=3000, receiver=second_account)
+        Transaction.objects.get_or_create(
+            amount=250, origin=first_account, receiver=second_account
+        )
+        user = User.objects.create_superuser("admin", "admin@example.com", "admin")
+        self.client.force_login(user)
+        # The middleware keeps the logged user in the thread after the request
+        self.addCleanup(_set_current_user, None)
+
+    def test_account_changelist(self):
+        """Check the account balances are annotated in the changelist, not in the count"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("admin:bank_account_changelist"))
+        sums = [query["sql"] for query in queries if "SUM(" in query["sql"]]
+        self.assertEquals(len(queries), 6)
+        self.assertEquals(len(sums), 1)
+        self.assertNotIn("COUNT(", sums[0])
+        balances = {
+            account.identifier: account.balance
+            for account in response.context["cl"].result_list
+        }
+        self.assertEquals(
+            balances, {"ES12 1111 11111": 4750.0, "ES12 3456 78910": 3250.0}
+        )
+
+    def test_transaction_changelist(self):
+        """Check the transaction changelist loads its accounts in the same query"""
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("admin:bank_transaction_changelist"))
+        self.assertContains(response, "ES12 3456 78910")
+
+    def test_estimate_count(self):
+        """Only unfiltered querysets are estimated"""
+        self.assertEquals(estimate_count(Transaction.objects.all()), 3)
+        self.assertIsNone(estimate_count(Transaction.objects.filter(amount=250)))
+
+    def test_estimated_count_paginator(self):
+        """The estimate is only used above the threshold"""
+        Transaction.objects.filter(amount=3000).delete()
+        paginator = EstimatedCountPaginator(Transaction.objects.order_by("id"), 10)
+        self.assertEquals(paginator.count, 2)
+
+        paginator = EstimatedCountPaginator(Transaction.objects.order_by("id"), 10)
+        paginator.threshold = 1
+        self.assertEquals(paginator.count, 3)
@@ -1,11 +1,18 @@
 import json
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework.serializers import ValidationError
 
-from ..models import Account, Customer, Transaction
+from ..api import idempotency
+from ..models import Account, Customer, IdempotencyKey, Transaction
+from ..pagination import CachedCountPaginator
 
 
 class AccountApiTests(TestCase):
@@ -88,6 +95,76 @@ class AccountApiTests(TestCase):
         self.assertRaisesMessage(ValidationError, "You must specify an initial amount")
 
 
+class AccountPaginationApiTests(TestCase):
+    fixtures = ["customers"]
+
+    def setUp(self):
+        """Account test data"""
+        cache.clear()
+        Account.objects.get_or_create(
+            identifier="ES12 1111 11111", owner=Customer.objects.first()
+        )
+        Account.objects.get_or_create(
+            identifier="ES12 3456 78910", owner=Customer.objects.first()
+        )
+
+    def test_cached_count(self):
+        """The count of a list is reused by the following requests with the same filters"""
+        response = self.client.get(reverse("bank:account-list"))
+        data = json.loads(response.content)
+        self.assertEquals(data["count"], 2)
+        self.assertFalse(data["count_is_approximate"])
+
+        Account.objects.create(
+            identifier="ES00 0000 00000", owner=Customer.objects.last()
+        )
+        response = self.client.get(reverse("bank:account-list"))
+        data = json.loads(response.content)
+        self.assertEquals(data["count"], 2)
+        self.assertTrue(data["count_is_approximate"])
+
+        cache.clear()
+        response = self.client.get(reverse("bank:account-list"))
+        data = json.loads(response.content)
+        self.assertEquals(data["count"], 3)
+        self.assertFalse(data["count_is_approximate"])
+        self.assertEquals(len(data["results"]), 3)
+
+    def test_stale_count_returns_every_row(self):
+        """A cached count lower than the rows does not hide any of them"""
+        self.client.get(reverse("bank:account-list"))
+        for number in range(10):
+            Account.objects.create(
+                identifier=f"ES00 0000 0000{number}", owner=Customer.objects.last()
+            )
+
+        response = self.client.get(reverse("bank:account-list"))
+        data = json.loads(response.content)
+        self.assertEquals(data["count"], 2)
+        self.assertTrue(data["count_is_approximate"])
+        self.assertEquals(len(data["results"]), 10)
+        self.assertIsNotNone(data["next"])
+
+        response = self.client.get(data["next"])
+        data = json.loads(response.content)
+        self.assertEquals(
+            [account["identifier"] for account in data["results"]],
+            ["ES12 3456 78910", "ES12 1111 11111"],
+        )
+        self.assertIsNone(data["next"])
+
+    def test_approximate_count(self):
+        """Above the threshold the count is estimated and marked as approximate"""
+        threshold = CachedCountPaginator.threshold
+        CachedCountPaginator.threshold = 1
+        self.addCleanup(setattr, CachedCountPaginator, "threshold", threshold)
+
+        response = self.client.get(reverse("bank:account-list"))
+        data = json.loads(response.content)
+        self.assertEquals(data["count"], 2)
+        self.assertTrue(data["count_is_approximate"])
+
+
 class AccountTransferApiTests(TestCase):
     fixtures = ["customers"]
 
@@ -124,6 +201,21 @@ class AccountTransferApiTests(TestCase):
         self.assertEquals(Account.objects.get(pk=1).current_amount, 4500.0)
         self.assertEquals(Account.objects.get(pk=2).current_amount, 3500.0)
 
+    def test_transfer_between_other_accounts(self):
+        """Create a transaction between accounts other than the first one"""
+        third_account = Account.objects.create(
+            identifier="ES12 0000 22222", owner=Customer.objects.last()
+        )
+        post = json.dumps({"amount": 500, "receiver": third_account.pk})
+        response = self.client.post(
+            reverse("bank:account-transfer-amount", kwargs={"pk": 2}),
+            post,
+            content_type="application/json",
+        )
+        self.assertEquals(response.status_code, 201)
+        self.assertEquals(Account.objects.get(pk=2).current_amount, 2500.0)
+        self.assertEquals(third_account.current_amount, 500.0)
+
     def test_exceded_amount_transfer(self):
         """Create a transaction with amount greater than available amount"""
         post = json.dumps({"concept": "Gold carrots", "amount": 500000, "receiver": 2})
@@ -138,6 +230,159 @@ class AccountTransferApiTests(TestCase):
         )
 
 
+class AccountIdempotencyApiTests(TestCase):
+    fixtures = ["customers"]
+
+    def setUp(self):
+        """Account test data"""
+        first_account, created = Account.objects.get_or_create(
+            identifier="ES12 1111 11111", owner=Customer.objects.first()
+        )
+        second_account, created = Account.objects.get_or_create(
+            identifier="ES12 3456 78910", owner=Customer.objects.first()
+        )
+        Transaction.objects.get_or_create(amount=5000, receiver=first_account)
+        Transaction.objects.get_or_create(amount=3000, receiver=second_account)
+
+    def transfer(self, data: dict, key: str = "transfer-1"):
+        return self.client.post(
+            reverse("bank:account-transfer-amount", kwargs={"pk": 1}),
+            json.dumps(data),
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_transfer_retry(self):
+        """A retried transfer returns the first response without a new transaction"""
+        post = {"concept": "Piano classes", "amount": 500, "receiver": 2}
+        first_response = self.transfer(post)
+        retry_response = self.transfer(post)
+
+        self.assertEquals(first_response.status_code, 201)
+        self.assertEquals(retry_response.status_code, 201)
+        self.assertEquals(retry_response["Idempotent-Replayed"], "true")
+        self.assertEquals(
+            json.loads(retry_response.content), json.loads(first_response.content)
+        )
+        self.assertEquals(Account.objects.get(pk=1).current_amount, 4500.0)
+
+    def test_rejected_transfer_retry(self):
+        """Validation errors are stored and replayed too"""
+        post = {"concept": "Gold carrots", "amount": 500000, "receiver": 2}
+        self.assertEquals(self.transfer(post).status_code, 400)
+        Transaction.objects.create(amount=500000, receiver=Account.objects.get(pk=1))
+
+        response = self.transfer(post)
+        self.assertEquals(response.status_code, 400)
+        self.assertEquals(response["Idempotent-Replayed"], "true")
+
+    def test_key_reused(self):
+        """A key can not be used for a different request"""
+        self.transfer({"amount": 500, "receiver": 2})
+        response = self.transfer({"amount": 700, "receiver": 2})
+
+        self.assertEquals(response.status_code, 422)
+        self.assertEquals(Transaction.objects.count(), 3)
+
+    def test_key_in_progress(self):
+        """A retry of a request that has not finished yet gets a conflict"""
+        post = {"amount": 500, "receiver": 2}
+        IdempotencyKey.objects.create(
+            key="transfer-1",
+            path=reverse("bank:account-transfer-amount", kwargs={"pk": 1}),
+            request_hash=idempotency.request_hash(
+                SimpleNamespace(method="POST", data=post)
+            ),
+        )
+        wait_timeout = idempotency.WAIT_TIMEOUT
+        idempotency.WAIT_TIMEOUT = 0
+        self.addCleanup(setattr, idempotency, "WAIT_TIMEOUT", wait_timeout)
+
+        response = self.transfer(post)
+        self.assertEquals(response.status_code, 409)
+        self.assertEquals(Transaction.objects.count(), 2)
+
+    def test_abandoned_key_taken_over(self):
+        """A retry takes over a key whose request stopped without finishing"""
+        post = {"amount": 500, "receiver": 2}
+        IdempotencyKey.objects.create(
+            key="transfer-1",
+            path=reverse("bank:account-transfer-amount", kwargs={"pk": 1}),
+            request_hash=idempotency.request_hash(
+                SimpleNamespace(method="POST", data=post)
+            ),
+            started_datetime=timezone.now() - timedelta(seconds=idempotency.LEASE + 1),
+        )
+
+        response = self.transfer(post)
+        self.assertEquals(response.status_code, 201)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEquals(Account.objects.get(pk=1).current_amount, 4500.0)
+
+        response = self.transfer(post)
+        self.assertEquals(response["Idempotent-Replayed"], "true")
+        self.assertEquals(Account.objects.get(pk=1).current_amount, 4500.0)
+
+    def test_taken_over_request_rolled_back(self):
+        """A slow request whose key was taken over by a retry does not save anything"""
+        post = {"amount": 500, "receiver": 2}
+        store = idempotency.store
+
+        def take_over_and_store(record, response):
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                started_datetime=timezone.now()
+            )
+            store(record, response)
+
+        wait_timeout = idempotency.WAIT_TIMEOUT
+        idempotency.WAIT_TIMEOUT = 0
+        self.addCleanup(setattr, idempotency, "WAIT_TIMEOUT", wait_timeout)
+
+        with mock.patch.object(idempotency, "store", take_over_and_store):
+            response = self.transfer(post)
+        self.assertEquals(response.status_code, 409)
+        self.assertEquals(Account.objects.get(pk=1).current_amount, 5000.0)
+        self.assertIsNone(IdempotencyKey.objects.get().status_code)
+
+    def test_expired_key(self):
+        """Expired keys are released, the request runs again"""
+        post = {"amount": 500, "receiver": 2}
+        self.transfer(post)
+        IdempotencyKey.objects.update(
+            creation_datetime=idempotency.expiration_datetime() - timedelta(seconds=1)
+        )
+        response = self.transfer(post)
+
+        self.assertEquals(response.status_code, 201)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEquals(Account.objects.get(pk=1).current_amount, 4000.0)
+
+    def test_create_retry(self):
+        """A retried account creation returns the same account"""
+        post = json.dumps(
+            {
+                "identifier": "ES00 0000 00000",
+                "owner": Customer.objects.last().id,
+                "incomes": [{"concept": "Initial amount", "amount": 2000}],
+            }
+        )
+        responses = [
+            self.client.post(
+                reverse("bank:account-list"),
+                post,
+                content_type="application/json",
+                HTTP_IDEMPOTENCY_KEY="create-1",
+            )
+            for retry in range(2)
+        ]
+
+        self.assertEquals([response.status_code for response in responses], [201, 201])
+        self.assertEquals(
+            json.loads(responses[0].content), json.loads(responses[1].content)
+        )
+        self.assertEquals(Account.objects.count(), 3)
+
+
 class AccountBalanceApiTests(TestCase):
     fixtures = ["customers"]
 
@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase, override_settings
+
+from .. import db
+
+
+class SQLiteProfileTests(TransactionTestCase):
+    def test_pragmas(self):
+        """The configured pragmas are applied to new connections"""
+        with override_settings(BANK_SQLITE_PRAGMAS={"cache_size": -32000}):
+            db.configure_sqlite(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA cache_size")
+            self.assertEquals(cursor.fetchone()[0], -32000)
+
+    @mock.patch.object(db, "WRITE_RETRY_DELAY", 0)
+    @mock.patch.object(db, "SERIALIZE_WRITES", True)
+    def test_write_retried(self):
+        """A write that finds the database locked is retried"""
+        write = mock.Mock(side_effect=[OperationalError("database is locked"), "done"])
+        self.assertEquals(db.run_write(write), "done")
+        self.assertEquals(write.call_count, 2)
+
+    @mock.patch.object(db, "WRITE_RETRY_DELAY", 0)
+    @mock.patch.object(db, "SERIALIZE_WRITES", True)
+    def test_write_retries_bounded(self):
+        """The retries are bounded and other database errors are not retried"""
+        write = mock.Mock(side_effect=OperationalError("database is locked"))
+        with self.assertRaises(OperationalError):
+            db.run_write(write)
+        self.assertEquals(write.call_count, db.WRITE_RETRIES)
+
+        write = mock.Mock(side_effect=OperationalError("no such table"))
+        with self.assertRaises(OperationalError):
+            db.run_write(write)
+        self.assertEquals(write.call_count, 1)
+
+    @mock.patch.object(db, "SERIALIZE_WRITES", True)
+    def test_lock_released_between_retries(self):
+        """The write lock is not held while a write backs off"""
+        write = mock.Mock(side_effect=[OperationalError("database is locked"), "done"])
+        with mock.patch.object(db.time, "sleep") as sleep:
+            sleep.side_effect = lambda delay: self.assertFalse(
+                db.write_lock._is_owned()
+            )
+            self.assertEquals(db.run_write(write), "done")
+        self.assertEquals(sleep.call_count, 1)
+
+    @mock.patch.object(db, "WRITE_TIMEOUT", 0)
+    @mock.patch.object(db, "SERIALIZE_WRITES", True)
+    def test_write_timeout(self):
+        """A write is not retried after the timeout"""
+        write = mock.Mock(side_effect=OperationalError("database is locked"))
+        with self.assertRaises(OperationalError):
+            db.run_write(write)
+        self.assertEquals(write.call_count, 1)
@@ -0,0 +1,154 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import jobs
+from ..models import Account, Customer, Job, Transaction
+
+
+class BatchTransferJobTests(TestCase):
+    fixtures = ["customers"]
+
+    def setUp(self):
+        """Account test data"""
+        first_account, created = Account.objects.get_or_create(
+            identifier="ES12 1111 11111", owner=Customer.objects.first()
+        )
+        second_account, created = Account.objects.get_or_create(
+            identifier="ES12 3456 78910", owner=Customer.objects.first()
+        )
+        Transaction.objects.get_or_create(amount=5000, receiver=first_account)
+        Transaction.objects.get_or_create(amount=3000, receiver=second_account)
+
+    def test_enqueue(self):
+        """POST a batch of transfers and check it is queued instead of executed"""
+        post = json.dumps(
+            {
+                "transfers": [
+                    {"concept": "Rent", "amount": 700, "receiver": 2},
+                    {"concept": "Gym", "amount": 40, "receiver": 2},
+                ]
+            }
+        )
+        response = self.client.post(
+            reverse("bank:account-batch-transfer", kwargs={"pk": 1}),
+            post,
+            content_type="application/json",
+        )
+        data = json.loads(response.content)
+        self.assertEquals(response.status_code, 202)
+        self.assertEquals(data["status"], Job.PENDING)
+        self.assertEquals(Job.objects.get(pk=data["job"]).total, 2)
+        self.assertEquals(Transaction.objects.count(), 2)
+
+    def test_enqueue_without_transfers(self):
+        """POST a batch without transfers, expecting a validation error"""
+        response = self.client.post(
+            reverse("bank:account-batch-transfer", kwargs={"pk": 1}),
+            json.dumps({}),
+            content_type="application/json",
+        )
+        self.assertEquals(response.status_code, 400)
+        self.assertEquals(Job.objects.count(), 0)
+
+    def test_enqueue_invalid_transfers(self):
+        """POST a batch with transfers that are not objects, expecting a validation error"""
+        response = self.client.post(
+            reverse("bank:account-batch-transfer", kwargs={"pk": 1}),
+            json.dumps({"transfers": [{"amount": 10, "receiver": 2}, 1]}),
+            content_type="application/json",
+        )
+        self.assertEquals(response.status_code, 400)
+        self.assertEquals(Job.objects.count(), 0)
+
+    def test_run_invalid_transfer(self):
+        """A transfer that is not an object is reported without stopping the job"""
+        job = jobs.enqueue(
+            "batch_transfer",
+            {"origin": 1, "transfers": [1, {"amount": 10, "receiver": 2}]},
+            total=2,
+        )
+        jobs.run_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEquals(job.status, Job.DONE)
+        self.assertEquals(job.result["created"], [3])
+        self.assertIn("0", job.result["errors"])
+
+    def test_fail_stale_jobs(self):
+        """Running jobs without progress for too long are marked as failed"""
+        stale = jobs.enqueue("batch_transfer", {"origin": 1, "transfers": []})
+        alive = jobs.enqueue("batch_transfer", {"origin": 1, "transfers": []})
+        jobs.claim(stale.pk)
+        jobs.claim(alive.pk)
+        Job.objects.filter(pk=stale.pk).update(
+            modification_datetime=timezone.now()
+            - timedelta(seconds=jobs.STALE_TIMEOUT + 1)
+        )
+
+        self.assertEquals(jobs.fail_stale_jobs(), 1)
+        self.assertEquals(Job.objects.get(pk=stale.pk).status, Job.FAILED)
+        self.assertEquals(Job.objects.get(pk=alive.pk).status, Job.RUNNING)
+
+    def test_run(self):
+        """Run a queued batch and check the job status endpoint"""
+        job = jobs.enqueue(
+            "batch_transfer",
+            {
+                "origin": 1,
+                "transfers": [
+                    {"concept": "Rent", "amount": 700, "receiver": 2},
+                    {"concept": "Gold carrots", "amount": 500000, "receiver": 2},
+                ],
+            },
+            total=2,
+        )
+        jobs.run_job(job.pk)
+
+        response = self.client.get(reverse("bank:job-detail", kwargs={"pk": job.pk}))
+        data = json.loads(response.content)
+        self.assertEquals(data["status"], Job.DONE)
+        self.assertEquals(data["progress"], 2)
+        self.assertEquals(data["result"]["created"], [3])
+        self.assertIn("1", data["result"]["errors"])
+        self.assertEquals(Account.objects.get(pk=1).current_amount, 4300.0)
+
+    def test_run_failed(self):
+        """A job whose handler raises is marked as failed"""
+        job = jobs.enqueue("batch_transfer", {"origin": 1})
+        jobs.run_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEquals(job.status, Job.FAILED)
+        self.assertIn("KeyError", job.error)
+
+    def test_run_claimed_once(self):
+        """A job already taken by a worker is not run again"""
+        job = jobs.enqueue(
+            "batch_transfer",
+            {"origin": 1, "transfers": [{"amount": 10, "receiver": 2}]},
+        )
+        jobs.run_job(job.pk)
+        Job.objects.filter(pk=job.pk).update(status=Job.RUNNING)
+        jobs.run_job(job.pk)
+
+        self.assertEquals(Transaction.objects.filter(origin_id=1).count(), 1)
+
+    def test_run_jobs_reports_errors(self):
+        """Errors that leave a job running are reported by run_jobs"""
+        job = jobs.enqueue("batch_transfer", {"origin": 1, "transfers": []})
+        err = StringIO()
+        with mock.patch(
+            "bank.management.commands.run_jobs.run_job",
+            side_effect=OperationalError("database is locked"),
+        ), self.assertLogs("bank.management.commands.run_jobs", "ERROR"):
+            call_command("run_jobs", "--once", stdout=StringIO(), stderr=err)
+
+        self.assertIn(f"Job {job.pk} could not be finished", err.getvalue())
@@ -0,0 +1,132 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import journal
+from ..models import Account, Customer, JournalEntry, Transaction
+
+
+class JournalTests(TestCase):
+    fixtures = ["customers"]
+
+    def setUp(self):
+        """Account test data"""
+        self.first_account, created = Account.objects.get_or_create(
+            identifier="ES12 1111 11111", owner=Customer.objects.first()
+        )
+        self.second_account, created = Account.objects.get_or_create(
+            identifier="ES12 3456 78910", owner=Customer.objects.first()
+        )
+        Transaction.objects.get_or_create(amount=5000, receiver=self.first_account)
+        Transaction.objects.get_or_create(amount=3000, receiver=self.second_account)
+        self.transfer, created = Transaction.objects.get_or_create(
+            amount=250, origin=self.first_account, receiver=self.second_account
+        )
+
+    def replay(self, balances: journal.Balances) -> int:
+        return journal.replay(balances, journal.last_sequence())
+
+    def assertBalancesMatch(self, balances: journal.Balances):
+        for account in (self.first_account, self.second_account):
+            self.assertEquals(balances[account.pk], account.current_amount)
+
+    def test_entries(self):
+        """Every transaction is appended to the journal in order"""
+        entries = JournalEntry.objects.values_list("transaction_id", "amount")
+        self.assertEquals(list(entries), [(1, 5000), (2, 3000), (3, 250)])
+
+    def test_changes(self):
+        """Amount changes and deletions append reversal entries"""
+        self.transfer.concept = "Saturday dinner"
+        self.transfer.save()
+        self.assertEquals(JournalEntry.objects.count(), 3)
+
+        self.transfer.amount = 300
+        self.transfer.save()
+        Transaction.objects.filter(pk=1).delete()
+
+        entries = JournalEntry.objects.filter(sequence__gt=3)
+        self.assertEquals(
+            list(entries.values_list("transaction_id", "amount")),
+            [(3, -250), (3, 300), (1, -5000)],
+        )
+        with journal.Balances(accounts=2) as balances:
+            self.replay(balances)
+            self.assertBalancesMatch(balances)
+
+    def test_append_only(self):
+        """Journal entries can not be changed"""
+        entry = JournalEntry.objects.first()
+        entry.amount = 1
+        with self.assertRaises(TypeError):
+            entry.save()
+        with self.assertRaises(TypeError):
+            entry.delete()
+        with self.assertRaises(TypeError):
+            JournalEntry.objects.update(amount=1)
+        with self.assertRaises(TypeError):
+            JournalEntry.objects.all().delete()
+
+    def test_replay_resume(self):
+        """A replay into a balances file continues from the last sequence stored in it"""
+        handle, path = tempfile.mkstemp(suffix=".bin")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+
+        with journal.Balances(path, accounts=2) as balances:
+            self.assertEquals(self.replay(balances), 3)
+            self.assertBalancesMatch(balances)
+
+        Transaction.objects.create(
+            amount=1000, origin=self.second_account, receiver=self.first_account
+        )
+        with journal.Balances(path, accounts=2) as balances:
+            self.assertEquals(self.replay(balances), 1)
+            self.assertEquals(balances.sequence, 4)
+            self.assertBalancesMatch(balances)
+
+    def test_replay_command(self):
+        """Run the replay command and check the balances it prints"""
+        out = StringIO()
+        call_command("replay_journal", "--show", stdout=out)
+        self.assertIn("Account 1: 4750.00", out.getvalue())
+        self.assertIn("Account 2: 3250.00", out.getvalue())
+        self.assertIn("Replayed 3 entries", out.getvalue())
+
+    def test_tail(self):
+        """A consumer only gets the entries after its stored offset"""
+        batches = journal.tail("sync", batch_size=2)
+        self.assertEquals([entry.sequence for entry in next(batches)], [1, 2])
+        self.assertEquals([entry.sequence for entry in next(batches)], [3])
+        self.assertEquals(list(batches), [])
+        self.assertEquals(journal.get_offset("sync"), 3)
+
+        Transaction.objects.create(amount=10, receiver=self.first_account)
+        self.assertEquals(
+            [[entry.sequence for entry in batch] for batch in journal.tail("sync")],
+            [[4]],
+        )
+
+    def test_api(self):
+        """GET the journal entries after a sequence"""
+        response = self.client.get(
+            reverse("bank:journal-list"), {"after": 1, "limit": 1}
+        )
+        data = json.loads(response.content)
+        self.assertEquals(
+            data,
+            [
+                {
+                    "sequence": 2,
+                    "transaction": 2,
+                    "origin": None,
+                    "receiver": 2,
+                    "amount": 3000.0,
+                }
+            ],
+        )
@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from ..ledger import Reconciliation, id_ranges, scan_chunk
+from ..models import Account, Customer, Transaction
+
+
+class ReconcileLedgerTests(TestCase):
+    fixtures = ["customers"]
+
+    def setUp(self):
+        """Account test data"""
+        self.first_account, created = Account.objects.get_or_create(
+            identifier="ES12 1111 11111", owner=Customer.objects.first()
+        )
+        self.second_account, created = Account.objects.get_or_create(
+            identifier="ES12 3456 78910", owner=Customer.objects.first()
+        )
+        Transaction.objects.get_or_create(amount=5000, receiver=self.first_account)
+        Transaction.objects.get_or_create(amount=3000, receiver=self.second_account)
+        Transaction.objects.get_or_create(
+            amount=250, origin=self.first_account, receiver=self.second_account
+        )
+
+    def reconcile(self, chunk_size: int) -> Reconciliation:
+        reconciliation = Reconciliation()
+        last_id = Transaction.objects.last().pk
+        for chunk in map(scan_chunk, id_ranges(1, last_id, chunk_size)):
+            reconciliation.add(chunk)
+        return reconciliation
+
+    def call(self, *args) -> str:
+        out = StringIO()
+        call_command("reconcile_ledger", "--workers", "1", *args, stdout=out)
+        return out.getvalue()
+
+    def test_id_ranges(self):
+        """Check the id ranges cover every id once"""
+        self.assertEquals(id_ranges(1, 7, 3), [(1, 3), (4, 6), (7, 7)])
+
+    def test_balances(self):
+        """Check the balances match the account current amount whatever the chunk size"""
+        for chunk_size in (1, 2, 100):
+            reconciliation = self.reconcile(chunk_size)
+            self.assertEquals(
+                reconciliation.balances[self.first_account.pk],
+                self.first_account.current_amount,
+            )
+            self.assertEquals(
+                reconciliation.balances[self.second_account.pk],
+                self.second_account.current_amount,
+            )
+            self.assertEquals(reconciliation.negative_accounts, {})
+
+    def test_negative_balance(self):
+        """An account overdrawn in the past is reported even if its final balance is positive"""
+        Transaction.objects.create(
+            amount=9000, origin=self.second_account, receiver=self.first_account
+        )
+        Transaction.objects.create(amount=7000, receiver=self.second_account)
+        for chunk_size in (1, 2, 100):
+            reconciliation = self.reconcile(chunk_size)
+            self.assertEquals(
+                reconciliation.negative_accounts, {self.second_account.pk: -5750.0}
+            )
+            self.assertEquals(reconciliation.balances[self.second_account.pk], 1250.0)
+
+    def test_command_consistent(self):
+        """Run the command over a consistent ledger"""
+        self.assertIn("Ledger consistent", self.call("--chunk-size", "2"))
+
+    def test_command_invalid_transactions(self):
+        """Transactions without accounts, from before the constraint was enforced, are reported"""
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA ignore_check_constraints = ON")
+            orphan = Transaction.objects.create(amount=10)
+            cursor.execute("PRAGMA ignore_check_constraints = OFF")
+        with self.assertRaisesMessage(CommandError, "1 discrepancies found"):
+            self.call()
+
+        self.assertEquals(self.reconcile(100).orphans, [orphan.pk])
+
+    def test_command_snapshot(self):
+        """Compare the balances with a snapshot taken before new transactions"""
+        handle, path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        self.call("--write-snapshot", path)
+        Transaction.objects.create(amount=100, receiver=self.first_account)
+        self.assertIn("Ledger consistent", self.call("--snapshot", path))
+
+        with open(path) as snapshot_file:
+            snapshot = json.load(snapshot_file)
+        snapshot["balances"][str(self.first_account.pk)] = 1
+        with open(path, "w") as snapshot_file:
+            json.dump(snapshot, snapshot_file)
+        with self.assertRaisesMessage(CommandError, "1 discrepancies found"):
+            self.call("--snapshot", path)
@@ -1,3 +1,7 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
 
@@ -43,3 +47,25 @@ class AccountModelTests(TestCase):
         """Check the correcto sum of payments amounts"""
         self.assertEquals(Account.objects.get(pk=1).total_payments, 250.0)
         self.assertEquals(Account.objects.get(pk=2).total_payments, 0)
+
+
+class TransactionConstraintTests(TestCase):
+    fixtures = ["customers"]
+
+    def test_migration_stops_on_transactions_without_account(self):
+        """The constraint migration lists the rows that would break it"""
+        migration = import_module(
+            "bank.migrations.0004_fix_origin_or_receiver_required"
+        )
+        account = Account.objects.create(
+            identifier="ES12 1111 11111", owner=Customer.objects.first()
+        )
+        Transaction.objects.create(amount=5000, receiver=account)
+        migration.check_transactions_without_account(apps, None)
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA ignore_check_constraints = ON")
+            orphan = Transaction.objects.create(amount=10)
+            cursor.execute("PRAGMA ignore_check_constraints = OFF")
+        with self.assertRaisesMessage(RuntimeError, f"Ids: {orphan.pk}"):
+            migration.check_transactions_without_account(apps, None)
@@ -1,10 +1,12 @@
 from rest_framework import routers
 
-from .api.viewsets import AccountViewSet
+from .api.viewsets import AccountViewSet, JobViewSet, JournalViewSet
 
 app_name = "bank"
 
 router = routers.DefaultRouter()
 router.register(r"accounts", AccountViewSet, basename="account")
+router.register(r"jobs", JobViewSet, basename="job")
+router.register(r"journal", JournalViewSet, basename="journal")
 
 urlpatterns = router.urls
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -89,6 +90,30 @@ DATABASES = {
     }
 }
 
+# Set DATABASE_PROFILE=production to run SQLite in WAL mode with persistent
+# connections, a busy timeout and the writes of each process serialized. A write
+# waits at most BANK_WRITE_TIMEOUT seconds plus one busy timeout
+
+DATABASE_PROFILE = os.environ.get("DATABASE_PROFILE", "development")
+
+if DATABASE_PROFILE == "production":
+    DATABASES["default"].update(
+        {
+            "CONN_MAX_AGE": 600,
+            "OPTIONS": {"timeout": 5},
+        }
+    )
+    BANK_SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    }
+    BANK_SERIALIZE_WRITES = True
+    BANK_WRITE_RETRIES = 10
+    BANK_WRITE_TIMEOUT = 20
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -139,6 +164,25 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     # "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAdminUser",),
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "bank.api.pagination.CachedCountPagination",
     "PAGE_SIZE": 10,
 }
+
+# List endpoints reuse exact counts for this many seconds and estimate them above
+# the threshold of rows
+
+BANK_COUNT_CACHE_TIMEOUT = 30
+BANK_ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Seconds the responses of requests with an Idempotency-Key are kept, seconds a
+# retry waits for the first request with its key to finish, and seconds after which
+# an unfinished request is taken as abandoned and a retry can take its key over.
+# A request whose key was taken over is rolled back when it tries to finish
+
+BANK_IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+BANK_IDEMPOTENCY_WAIT_TIMEOUT = 5
+BANK_IDEMPOTENCY_LEASE = 60
+
+# Seconds a running job can go without progress before run_jobs marks it as failed
+
+BANK_JOB_STALE_TIMEOUT = 10 * 60